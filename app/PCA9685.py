@@ -14,6 +14,7 @@ class PCA9685:
   __SUBADR3            = 0x04
   __MODE1              = 0x00
   __MODE2              = 0x01
+  __AI                 = 0x20
   __PRESCALE           = 0xFE
   __LED0_ON_L          = 0x06
   __LED0_ON_H          = 0x07
@@ -30,7 +31,7 @@ class PCA9685:
     self.debug = debug
     if (self.debug):
       print("Reseting PCA9685")
-    self.write(self.__MODE1, 0x00)
+    self.write(self.__MODE1, self.__AI)     # auto-increment for block writes
 	
   def write(self, reg, value):
     "Writes an 8-bit value to the specified register/address"
@@ -38,6 +39,12 @@ class PCA9685:
     if (self.debug):
       print("I2C: Write 0x%02X to register 0x%02X" % (value, reg))
 	  
+  def writeBlock(self, reg, values):
+    "Writes consecutive registers starting at reg in a single I2C transaction"
+    self.bus.write_i2c_block_data(self.address, reg, values)
+    if (self.debug):
+      print("I2C: Write %d bytes from register 0x%02X" % (len(values), reg))
+
   def read(self, reg):
     "Read an unsigned byte from the I2C device"
     result = self.bus.read_byte_data(self.address, reg)
@@ -80,6 +87,16 @@ class PCA9685:
     pulse = pulse*4096//20000        #PWM frequency is 50HZ,the period is 20000us
     self.setPWM(channel, 0, pulse)
     
+  def setServoPulses(self, channel, pulses):
+    "Sets the Servo Pulse of consecutive channels starting at channel in one write"
+    data = []
+    for pulse in pulses:
+      off = pulse*4096//20000
+      data += [0, 0, off & 0xFF, off >> 8]
+    self.writeBlock(self.__LED0_ON_L+4*channel, data)
+    if (self.debug):
+      print("channels: %d-%d  pulses: %s" % (channel, channel+len(pulses)-1, pulses))
+
   def start_PCA9685(self):
     self.write(self.__MODE2, 0x04)
     #Just restore the stopped state that should be set for exit_PCA9685
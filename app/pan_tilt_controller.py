@@ -10,6 +10,14 @@ except ImportError:
 
     
 class PanTiltController:
+    # Pulse for every whole angle from -90 to 90 (500-2500 range, center at 1500)
+    _ANGLE_TO_PULSE = tuple(max(500, min(2500, int(1500 + (a * 1000 / 90))))
+                            for a in range(-90, 91))
+    
+    # Angles of the initial pulses written by __init__
+    HOME_PAN = 0
+    HOME_TILT = -45
+    
     def __init__(self, address=0x40, debug=False):
         self.pwm = PCA9685(address, debug)
         self.pwm.setPWMFreq(50)
@@ -18,6 +26,11 @@ class PanTiltController:
         self.HPulse = 1500  # Horizontal servo initial pulse
         self.VPulse = 1000  # Vertical servo initial pulse
         
+        # Last requested angles, kept so positions don't drift from rounding
+        # when converted back from pulses
+        self._pan_deg = self.HOME_PAN
+        self._tilt_deg = self.HOME_TILT
+        
         # Set initial positions
         self.pwm.setServoPulse(1, self.HPulse)  # Channel 1 for horizontal
         self.pwm.setServoPulse(0, self.VPulse)  # Channel 0 for vertical
@@ -26,39 +39,66 @@ class PanTiltController:
         self.HStep = 0
         self.VStep = 0
         
+    @staticmethod
+    def _clamp(angle):
+        """Truncate an angle to whole degrees within -90 to 90
+        Args:
+            angle (float): Angle in degrees
+        Returns:
+            int: Clamped angle in degrees
+        """
+        return max(-90, min(90, int(angle)))
+        
+    def _set_channel(self, channel, angle):
+        """Drive a servo channel to an angle
+        Args:
+            channel (int): PCA9685 channel (0 vertical, 1 horizontal)
+            angle (int): Angle in degrees, clamped to -90 to 90
+        Returns:
+            tuple: (Clamped angle in degrees, pulse written to the channel)
+        """
+        angle = self._clamp(angle)
+        pulse = self._ANGLE_TO_PULSE[angle + 90]
+        self.pwm.start_PCA9685()
+        self.pwm.setServoPulse(channel, pulse)
+        return angle, pulse
+        
     def set_pan(self, angle):
         """Set pan angle (horizontal movement)
         Args:
             angle (int): Angle in degrees (-90 to 90)
         """
-        # Convert angle to pulse (500-2500 range, center at 1500)
-        pulse = int(1500 + (angle * 1000 / 90))
-        pulse = max(500, min(2500, pulse))
-        
-        self.HPulse = pulse
-        self.pwm.start_PCA9685()
-        self.pwm.setServoPulse(1, self.HPulse)
+        self._pan_deg, self.HPulse = self._set_channel(1, angle)
         
     def set_tilt(self, angle):
         """Set tilt angle (vertical movement)
         Args:
             angle (int): Angle in degrees (-90 to 90)
         """
-        # Convert angle to pulse (500-2500 range, center at 1500)
-        pulse = int(1500 + (angle * 1000 / 90))
-        pulse = max(500, min(2500, pulse))
+        self._tilt_deg, self.VPulse = self._set_channel(0, angle)
         
-        self.VPulse = pulse
+    def set_pose(self, pan_angle, tilt_angle):
+        """Set pan and tilt angles together in a single I2C transaction
+        Args:
+            pan_angle (int): Pan angle in degrees (-90 to 90)
+            tilt_angle (int): Tilt angle in degrees (-90 to 90)
+        """
+        self._pan_deg = self._clamp(pan_angle)
+        self._tilt_deg = self._clamp(tilt_angle)
+        self.HPulse = self._ANGLE_TO_PULSE[self._pan_deg + 90]
+        self.VPulse = self._ANGLE_TO_PULSE[self._tilt_deg + 90]
+        
+        # Channels 0 (vertical) and 1 (horizontal) are adjacent registers
         self.pwm.start_PCA9685()
-        self.pwm.setServoPulse(0, self.VPulse)
+        self.pwm.setServoPulses(0, [self.VPulse, self.HPulse])
         
     def get_pan(self):
         """Get current pan position in degrees"""
-        return int((self.HPulse - 1500) * 90 / 1000)
+        return self._pan_deg
     
     def get_tilt(self):
         """Get current tilt position in degrees"""
-        return int((self.VPulse - 1500) * 90 / 1000)
+        return self._tilt_deg
     
     def move_relative(self, pan_delta=0, tilt_delta=0):
         """Move relative to current position
@@ -66,6 +106,12 @@ class PanTiltController:
             pan_delta (int): Pan change in degrees
             tilt_delta (int): Tilt change in degrees
         """
+        if pan_delta != 0 and tilt_delta != 0:
+            new_pan = max(-90, min(90, self.get_pan() + pan_delta))
+            new_tilt = max(-90, min(90, self.get_tilt() + tilt_delta))
+            self.set_pose(new_pan, new_tilt)
+            return
+        
         if pan_delta != 0:
             new_pan = self.get_pan() + pan_delta
             new_pan = max(-90, min(90, new_pan))
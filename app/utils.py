@@ -3,18 +3,20 @@ Utils module, contains utility functions used throughout the postgrez codebase.
 """
 import logging
 import logging.config
-import glob
+import functools
+import fnmatch
 import os
 import sys
 import subprocess
-import ast
-import signal
+import ssl
 import time
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import psutil
 import boto3
+import orjson
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 import redis
@@ -28,16 +30,87 @@ except:
     from pan_tilt_controller import PanTiltController
 
 LOGGER = logging.getLogger(__name__)
-CONF = config.load_private_config()
-REDIS_CONN = redis.StrictRedis(
+# Shared by the threads of this process, each process (gunicorn worker,
+# security system) gets its own pool. Capped well above the number of threads
+# that use redis in any one process; once all connections are checked out,
+# further callers get a ConnectionError instead of opening more sockets
+REDIS_POOL = redis.ConnectionPool(
     host='localhost',
     port=6379,
-    decode_responses=True
+    max_connections=16,
+    socket_keepalive=True
 )
+REDIS_CONN = redis.StrictRedis(connection_pool=REDIS_POOL)
 
-SLACK_BOT_TOKEN = CONF['rpi_cam_app']['bot_token']
+SLACK_TIMEOUT = 30  # seconds
+THERMAL_ZONE_PATH = '/sys/class/thermal/thermal_zone0/temp'
 
-pan_tilt = PanTiltController()
+# Slack clients keyed by token, so every helper reuses the same client
+# instead of building a new one per call. They share one SSL context so the
+# CA bundle is loaded once rather than for every HTTPS connection
+_SLACK_CLIENTS = {}
+_SLACK_SSL_CONTEXT = ssl.create_default_context()
+
+# Created on first upload so importers that never touch S3 skip boto3's
+# credential and endpoint resolution
+_S3_CLIENT = None
+
+# Created on the first move, constructing the controller writes to the I2C bus
+# and moves the servos to their initial position. Each gunicorn worker has its
+# own controller, so the current angles are shared through redis instead
+_pan_tilt = None
+
+@functools.lru_cache(maxsize=None)
+def _conf():
+    """Load the private config once, on first use
+
+    Returns:
+        dict: Contents of private.yml
+    """
+    return config.load_private_config()
+
+def get_pan_tilt():
+    """Return this process's pan/tilt controller, creating it on first use.
+    Only call this to move the camera, use get_pan/get_tilt to read the
+    position
+
+    Returns:
+        PanTiltController: Pan/tilt controller
+    """
+    global _pan_tilt
+    if _pan_tilt is None:
+        _pan_tilt = PanTiltController()
+    return _pan_tilt
+
+def _get_slack_client(token=None):
+    """Return the shared Slack client for a token, creating it on first use
+
+    Args:
+        token (str, optional): Token to use with WebClient. Defaults to
+            bot_token specified in private.yml
+
+    Returns:
+        WebClient: Slack client associated with the token
+    """
+    if token is None:
+        token = _conf()['rpi_cam_app']['bot_token']
+    slack_client = _SLACK_CLIENTS.get(token)
+    if slack_client is None:
+        slack_client = WebClient(
+            token=token, timeout=SLACK_TIMEOUT, ssl=_SLACK_SSL_CONTEXT)
+        _SLACK_CLIENTS[token] = slack_client
+    return slack_client
+
+def _get_s3_client():
+    """Return the shared S3 client, creating it on first use
+
+    Returns:
+        botocore.client.S3: S3 client
+    """
+    global _S3_CLIENT
+    if _S3_CLIENT is None:
+        _S3_CLIENT = boto3.client('s3')
+    return _S3_CLIENT
 
 def redis_get(key):
     """Fetch a key from redis
@@ -48,60 +121,81 @@ def redis_get(key):
     Returns:
         Value associated with redis key
     """
-    str_obj = REDIS_CONN.get(key)
-    
-    if str_obj is None:
+    value = REDIS_CONN.get(key)
+    if value is None:
         return None
 
-    # Handle boolean strings
-    if str_obj in ('True', 'False'):
-        return str_obj == 'True'
-    
-    # Need to research a better way of parsing underlying Python object types
-    # from strings redis returns..
     try:
-        value = ast.literal_eval(str_obj)
-    except ValueError:
-        value = str_obj
-    except SyntaxError:
-        value = str_obj
-    return value
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        # Value was written before redis_set switched to JSON payloads, when
+        # booleans were stored as 'True'/'False'. Legacy ints and floats are
+        # already valid JSON
+        value = value.decode()
+        if value in ('True', 'False'):
+            return value == 'True'
+        return value
 
 def redis_set(key, value):
     """Set a value in Redis
 
     Args:
         key (str): Redis key name
-        value (): Value to be associated with key
+        value (): JSON serializable value to be associated with key
     """
-    # Convert boolean and other types to string for Redis
-    if isinstance(value, bool):
-        value = str(value)
-    REDIS_CONN.set(key, value)
+    REDIS_CONN.set(key, orjson.dumps(value))
 
-def save_image(filepath, frame):
+def save_image(filepath, frame, params=None):
     """Save an image
     Args:
         filepath (str): Filepath to save image to
         frame (numpy.ndarray): Image to save
+        params (list, optional): cv2.imwrite encoding params. Defaults to
+            JPEG quality 85 for .jpg/.jpeg and the fastest PNG compression for
+            .png files
     """
     LOGGER.debug('Saving image to %s' % filepath)
-    cv2.imwrite(filepath, frame)
+    if params is None:
+        ext = os.path.splitext(filepath)[1].lower()
+        if ext in ('.jpg', '.jpeg'):
+            params = [cv2.IMWRITE_JPEG_QUALITY, 85]
+        elif ext == '.png':
+            params = [cv2.IMWRITE_PNG_COMPRESSION, 1]
+        else:
+            params = []
+    cv2.imwrite(filepath, frame, params)
     return
 
+def set_pose(pan, tilt):
+    """Move the camera and record the new position in redis so every process
+    reports it
+
+    Args:
+        pan (int): Pan angle in degrees (-90 to 90)
+        tilt (int): Tilt angle in degrees (-90 to 90)
+    """
+    pan_tilt = get_pan_tilt()
+    pan_tilt.set_pose(pan, tilt)
+    redis_set('pan', pan_tilt.get_pan())
+    redis_set('tilt', pan_tilt.get_tilt())
+
 def get_tilt():
-    """Get the current tilt value
+    """Get the last tilt value set through set_pose, without touching the
+    servos
     Returns:
         int: Current tilt value in degrees
     """
-    return pan_tilt.get_tilt()
+    tilt = redis_get('tilt')
+    return PanTiltController.HOME_TILT if tilt is None else tilt
 
 def get_pan():
-    """Get the current pan value
+    """Get the last pan value set through set_pose, without touching the
+    servos
     Returns:
         int: Current pan value in degrees
     """
-    return pan_tilt.get_pan()
+    pan = redis_get('pan')
+    return PanTiltController.HOME_PAN if pan is None else pan
 
 def validate_slack(token):
     """Verify the request is coming from Slack by checking that the
@@ -113,7 +207,7 @@ def validate_slack(token):
     Returns:
         bool: Indicate whether token received matches known verification token
     """
-    if CONF['rpi_cam_app']['verification_token'] != token:
+    if _conf()['rpi_cam_app']['verification_token'] != token:
         return False
     return True
 
@@ -141,7 +235,7 @@ def slack_post_interactive(response):
     if response['ok']:
         file_id = response['file']['id']
         filename = response['file']['title']
-        slack_client = WebClient(token=SLACK_BOT_TOKEN)
+        slack_client = _get_slack_client()
         
         # Use modern blocks instead of legacy attachments
         blocks = [
@@ -195,7 +289,7 @@ def slack_post_interactive(response):
         ]
         
         response = slack_client.chat_postMessage(
-            channel=CONF['alerts_channel'],
+            channel=_conf()['alerts_channel'],
             text=f'Tag Image {filename}',
             blocks=blocks
         )
@@ -211,12 +305,11 @@ def slack_delete_file(file_id):
     Returns:
         dict: Slack response object
     """
-    slack_client = WebClient(token=SLACK_BOT_TOKEN)
+    slack_client = _get_slack_client()
     response = slack_client.files_delete(file=file_id)
     return response
 
-def slack_post(message, channel=CONF['alerts_channel'],
-               token=SLACK_BOT_TOKEN):
+def slack_post(message, channel=None, token=None):
     """Post a message to a channel
 
     Args:
@@ -227,7 +320,9 @@ def slack_post(message, channel=CONF['alerts_channel'],
             specified in private.yml
     """
     LOGGER.debug("Posting to slack")
-    slack_client = WebClient(token=token)
+    if channel is None:
+        channel = _conf()['alerts_channel']
+    slack_client = _get_slack_client(token)
     try:
         response = slack_client.chat_postMessage(
             channel=channel,
@@ -242,15 +337,16 @@ def slack_post(message, channel=CONF['alerts_channel'],
     
     return
 
-def slack_upload(fname, title=None, channel=CONF['alerts_channel'],
-                 token=SLACK_BOT_TOKEN):
+def slack_upload(fname, title=None, channel=None, token=None):
     """Upload a file to a channel with better error handling"""
     if title is None:
         title = os.path.basename(fname)
-    slack_client = WebClient(token=token)
+    if channel is None:
+        channel = _conf()['alerts_channel']
+    slack_client = _get_slack_client(token)
     
     max_retries = 3
-    retry_delay = 2  # seconds
+    retry_delay = 2  # seconds, doubled after each failed attempt
     
     for attempt in range(max_retries):
         try:
@@ -265,13 +361,13 @@ def slack_upload(fname, title=None, channel=CONF['alerts_channel'],
             LOGGER.error(f'Slack API error (attempt {attempt + 1}/{max_retries}): {e.response["error"]}')
             if attempt == max_retries - 1:  # Last attempt
                 return {'ok': False, 'error': e.response['error']}
-            time.sleep(retry_delay)
+            time.sleep(retry_delay * 2**attempt)
             
         except Exception as e:
             LOGGER.error(f'Network error (attempt {attempt + 1}/{max_retries}): {str(e)}')
             if attempt == max_retries - 1:  # Last attempt
                 return {'ok': False, 'error': str(e)}
-            time.sleep(retry_delay)
+            time.sleep(retry_delay * 2**attempt)
     
     return {'ok': False, 'error': 'All retry attempts failed'}
 
@@ -312,12 +408,20 @@ def kill_python_process(pid):
     try:
         if check_process(pid):
             LOGGER.info('Killing pid: %s', pid)
-            os.kill(pid, signal.SIGKILL)
-            time.sleep(2)
-            status = check_process(pid)
-            if not status:
+            proc = psutil.Process(pid)
+            proc.kill()
+            try:
+                # Returns as soon as the process exits (and reaps it if it is
+                # our child) instead of sleeping a fixed interval
+                proc.wait(timeout=2)
                 LOGGER.info('Successfully killed process')
                 killed = True
+            except psutil.TimeoutExpired:
+                # wait only reaps our own children, a process spawned by
+                # another worker lingers as a zombie, which counts as killed
+                killed = not check_process(pid)
+                if killed:
+                    LOGGER.info('Successfully killed process')
         else:
             killed = True
     except Exception as exc:
@@ -334,14 +438,13 @@ def check_process(pid):
     """
     LOGGER.info('Checking if %s is running', pid)
     try:
-        os.kill(pid, 0)
         proc = psutil.Process(pid)
         if proc.status() == psutil.STATUS_ZOMBIE:
             status = False
         else:
             LOGGER.info('Process %s is running', pid)
             status = True
-    except OSError:
+    except (psutil.NoSuchProcess, ProcessLookupError):
         status = False
 
     return status
@@ -363,14 +466,22 @@ def latest_file(path, ftype='*'):
         LOGGER.error('Please supply a valid directory')
         return None
 
-    if not path.endswith('/'):
-        path += '/'
-
-    list_of_files = glob.glob(path + ftype) # all filetypes
-    list_of_files = [f for f in list_of_files if os.path.isfile(f)]
-    if list_of_files:
-        last_file = max(list_of_files, key=os.path.getctime)
-    else:
+    # Single directory pass, DirEntry caches the type and stat info
+    last_ctime = -1
+    with os.scandir(path) as entries:
+        for entry in entries:
+            # glob style matching, hidden files only match explicit patterns
+            if entry.name.startswith('.') and not ftype.startswith('.'):
+                continue
+            if not entry.is_file() or not fnmatch.fnmatch(entry.name, ftype):
+                continue
+            # lstat result is cached on the entry, no extra follow-up stat
+            ctime = entry.stat(follow_symlinks=False).st_ctime
+            if ctime > last_ctime:
+                last_ctime = ctime
+                last_file = entry.path
+
+    if last_file is None:
         LOGGER.error('No files in directory')
 
     return last_file
@@ -386,49 +497,79 @@ def search_path(path, filetypes=None):
     Returns:
         files (list): List of files
     """
-    files = []
-    for (dirpath, dirnames, filenames) in os.walk(path):
-        if filetypes:
-            files.extend([os.path.join(dirpath, file) for file in filenames
-                          if file.endswith(tuple(filetypes))])
-        else:
-            files.extend([os.path.join(dirpath, file) for file in filenames])
-    return files
+    suffixes = tuple(filetypes) if filetypes else None
+
+    def _walk(dirpath):
+        # Like os.walk, skip missing or unreadable directories instead of
+        # raising
+        try:
+            entries = os.scandir(dirpath)
+        except OSError:
+            return
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # Like os.walk, don't descend into symlinked directories
+                    if not entry.is_symlink():
+                        yield from _walk(entry.path)
+                elif suffixes is None or entry.name.endswith(suffixes):
+                    yield entry.path
+
+    return list(_walk(path))
 
 def upload_to_s3(s3_bucket, local, key):
-    """Upload a list of files to S3.
+    """Upload a file to S3. The file is streamed from disk, and large files
+    are sent as concurrent multipart uploads.
 
     Args:
         s3_bucket (str): Name of the S3 bucket.
-        files (list): List of files to upload
+        local (str): Path of the file to upload
+        key (str): S3 key to upload the file to
     """
     LOGGER.info("Attempting to load %s to s3 bucket: s3://%s, key: %s", local,
                 s3_bucket, key)
-    s3 = boto3.resource('s3')
-    data = open(local, 'rb')
-    s3.Bucket(s3_bucket).put_object(
-        Key=key, Body=data, ServerSideEncryption='AES256')
+    s3 = _get_s3_client()
+    s3.upload_file(local, s3_bucket, key,
+                   ExtraArgs={'ServerSideEncryption': 'AES256'})
+
+def _delete_path(entry):
+    """Delete a file, or a folder and its contents
+
+    Args:
+        entry (os.DirEntry): Directory entry to delete
+    """
+    if entry.is_dir(follow_symlinks=False):
+        shutil.rmtree(entry.path)
+    else:
+        os.remove(entry.path)
 
-def clean_dir(path, exclude=None):
-    """Clear folders and files in a specified path
+def clean_dir(path, exclude=None, max_workers=8):
+    """Clear folders and files in a specified path. Deletion is I/O bound, so
+    entries are removed concurrently. Symlinks to folders are left in place
+    rather than followed.
 
     Args:
         path (str): Path to clean files/folders
         exclude (list, optiona): Filenames to exclude from deletion
+        max_workers (int, optional): Number of threads deleting entries
     """
     if not exclude:
         exclude = []
 
-    for file in os.listdir(path):
-        full_path = os.path.join(path, file)
-        if os.path.isdir(full_path):
-            shutil.rmtree(full_path)
-            assert not os.path.isdir(full_path)
-        elif os.path.isfile(full_path) and file not in exclude:
-            os.remove(full_path)
-            assert not os.path.isfile(full_path)
+    with os.scandir(path) as entries:
+        to_delete = [entry for entry in entries
+                     if entry.is_dir(follow_symlinks=False)
+                     or (entry.is_file() and entry.name not in exclude)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Consume the results so any deletion error is raised here
+        list(executor.map(_delete_path, to_delete))
 
 def measure_temp():
-    temp = os.popen("vcgencmd measure_temp").readline()
-    parsed_temp = temp.replace("temp=", "").split("'C")[0]
-    return float(parsed_temp)
\ No newline at end of file
+    """Read the CPU temperature from sysfs rather than forking vcgencmd
+
+    Returns:
+        float: CPU temperature in degrees Celsius
+    """
+    with open(THERMAL_ZONE_PATH) as f:
+        return int(f.read()) / 1000.0
@@ -15,16 +15,9 @@ from app import application as app
 from app import config
 from app import utils
 
-try:
-    from app.pan_tilt_controller import PanTiltController
-except:
-    from pan_tilt_controller import PanTiltController
-
-
 logging.basicConfig(level=logging.DEBUG)
 LOGGER = logging.getLogger(__name__)
 CONF = config.load_private_config()
-pan_tilt = PanTiltController()
 
 def slack_verification(user=None):
     """Verify post request came from Slack by checking the token sent with the
@@ -56,8 +49,7 @@ def initialize():
     # set redis variables
     LOGGER.info('Initializing camera redis variables')
     # Replace pantilthat calls with Waveshare controller
-    pan_tilt.set_pan(40)    # Instead of pantilthat.pan(40)
-    pan_tilt.set_tilt(10)   # Instead of pantilthat.tilt(10)
+    utils.set_pose(40, 10)   # Instead of pantilthat.pan(40), tilt(10)
     utils.redis_set('home', False)
     utils.redis_set('auto_detect_status', True)
     utils.redis_set('camera_status', True)
@@ -229,8 +221,7 @@ def rotate():
         time.sleep(1)
 
     # Replace pantilthat calls
-    pan_tilt.set_pan(pan)
-    pan_tilt.set_tilt(tilt)
+    utils.set_pose(pan, tilt)
 
     if curr_status:
         utils.redis_set('camera_status', True)
@@ -1,31 +1,34 @@
-from picamera2 import Picamera2
+from picamera2 import Picamera2, MappedArray
 import cv2
-import time
 
 camera = Picamera2()
 
 # Configure for video with specific controls
 config = camera.create_video_configuration(
-    main={"size": (640, 480), "format": "RGB888"},
+    main={"size": (640, 480), "format": "YUV420"},
     controls={"FrameRate": 32}
 )
 camera.configure(config)
 
-print('Warming up camera')
+print('Starting camera')
 camera.start()
-time.sleep(2)
 
 i = 0
 try:
     while i <= 5: 
         print(i)
         
-        # Capture frame
-        frame = camera.capture_array()
-        
-        # Convert to grayscale and save
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        cv2.imwrite('{}.png'.format(i), gray)
+        # Capture frame, blocks until the first frame is ready so no warmup
+        # sleep is needed
+        request = camera.capture_request()
+        try:
+            # Map the buffer in place instead of copying it into a new array
+            with MappedArray(request, 'main') as yuv:
+                # The Y plane packed in the top rows is already the grayscale image
+                gray = yuv.array[:480, :640]
+                cv2.imwrite('{}.jpg'.format(i), gray, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        finally:
+            request.release()
         
         i += 1
         
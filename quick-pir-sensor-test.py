@@ -9,11 +9,33 @@ Expected behavior:
 """
 
 import RPi.GPIO as GPIO
+import os
+import signal
+import threading
 import time
 from datetime import datetime
 
 PIR_PIN = 21
 
+def set_fifo_priority(prio=50):
+    """Move this process to the SCHED_FIFO real-time scheduler so edge
+    callbacks wake up with sub-ms latency instead of CFS's multi-ms jitter.
+    Requires root or CAP_SYS_NICE, e.g.
+    `sudo setcap cap_sys_nice+ep $(readlink -f $(which python3))`
+
+    Args:
+        prio (int): Real-time priority, 1 (lowest) to 99 (highest)
+
+    Returns:
+        bool: True if the scheduler was changed, otherwise False
+    """
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(prio))
+    except PermissionError:
+        print("⚠️  No CAP_SYS_NICE - running with normal scheduling")
+        return False
+    return True
+
 def test_pir_l_mode():
     print("=" * 60)
     print("PIR Sensor Test - Verifying L Mode Settings")
@@ -22,6 +44,9 @@ def test_pir_l_mode():
     print("If it stays HIGH for 30+ seconds, switch to L mode!")
     print("=" * 60)
     
+    # Before add_event_detect so the callback thread inherits the policy
+    set_fifo_priority()
+    
     GPIO.setmode(GPIO.BCM)
     GPIO.setwarnings(False)
     GPIO.setup(PIR_PIN, GPIO.IN)
@@ -39,25 +64,24 @@ def test_pir_l_mode():
     print("  3. Keep moving - should see MULTIPLE pulses\n")
     print("Press CTRL+C to exit\n")
     
-    motion_count = 0
-    previous_state = 0
-    high_start = None
+    state = {'motion_count': 0, 'previous_state': 0, 'high_start': None}
+    lock = threading.Lock()
     
-    try:
-        while True:
-            current_state = GPIO.input(PIR_PIN)
-            
-            if current_state == 1 and previous_state == 0:
+    def _on_edge(channel):
+        current_state = GPIO.input(channel)
+        
+        with lock:
+            if current_state == 1 and state['previous_state'] == 0:
                 # Motion started
-                motion_count += 1
-                high_start = time.time()
+                state['motion_count'] += 1
+                state['high_start'] = time.time()
                 timestamp = datetime.now().strftime("%H:%M:%S")
-                print(f"🔴 [{timestamp}] HIGH started (pulse #{motion_count})")
-                previous_state = 1
+                print(f"🔴 [{timestamp}] HIGH started (pulse #{state['motion_count']})")
+                state['previous_state'] = 1
                 
-            elif current_state == 0 and previous_state == 1:
+            elif current_state == 0 and state['previous_state'] == 1:
                 # Motion ended
-                high_duration = time.time() - high_start
+                high_duration = time.time() - state['high_start']
                 timestamp = datetime.now().strftime("%H:%M:%S")
                 print(f"⚪ [{timestamp}] LOW - pulse lasted {high_duration:.1f}s")
                 
@@ -66,13 +90,19 @@ def test_pir_l_mode():
                     print("   ⚠️  Pulse > 10s - consider L mode or lower Tx!")
                 
                 print()  # Blank line for readability
-                previous_state = 0
-            
-            time.sleep(0.05)  # Check 20 times per second
+                state['previous_state'] = 0
+    
+    try:
+        # Let the kernel deliver edges instead of polling the pin
+        GPIO.add_event_detect(PIR_PIN, GPIO.BOTH, callback=_on_edge, bouncetime=5)
+        # A pin already HIGH produces no rising edge, so count it like the
+        # first poll would have
+        _on_edge(PIR_PIN)
+        signal.pause()
             
     except KeyboardInterrupt:
         print("\n" + "=" * 60)
-        print(f"Total pulses detected: {motion_count}")
+        print(f"Total pulses detected: {state['motion_count']}")
         print("=" * 60)
     finally:
         GPIO.cleanup()